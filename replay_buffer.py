@@ -0,0 +1,102 @@
+import json
+import os
+
+import numpy as np
+
+ACTION_KEYS = ("throttle", "brake", "steer")
+
+
+class MemmapReplayBuffer:
+    """
+    Fixed-capacity ring buffer of (state, action, reward) transitions stored in
+    memory-mapped files under `directory`, so it can hold far more experience
+    than fits in RAM and is picked up again by the next run.
+    """
+
+    META_FILE = "meta.json"
+
+    def __init__(self, directory: str, state_dim: int, capacity: int = 10_000_000,
+                 chunk_size: int = 1, seed=None):
+        self.directory = directory
+        self.state_dim = state_dim
+        self.capacity = capacity
+        self.chunk_size = max(1, chunk_size)
+        self.rng = np.random.default_rng(seed)
+
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if meta["state_dim"] != state_dim or meta["capacity"] != capacity:
+                raise ValueError(
+                    f"Replay buffer in {directory} has state_dim={meta['state_dim']}, "
+                    f"capacity={meta['capacity']}; expected state_dim={state_dim}, capacity={capacity}"
+                )
+            self.size = meta["size"]
+            self.cursor = meta["cursor"]
+            mode = "r+"
+            print(f"Loaded replay buffer from {directory} ({self.size} transitions)")
+        else:
+            self.size = 0
+            self.cursor = 0
+            mode = "w+"
+
+        self.states = self._open("states.f32", (capacity, state_dim), mode)
+        self.actions = self._open("actions.f32", (capacity, len(ACTION_KEYS)), mode)
+        self.rewards = self._open("rewards.f32", (capacity,), mode)
+        if mode == "w+":
+            self._write_meta()
+
+    def _open(self, name, shape, mode):
+        return np.memmap(os.path.join(self.directory, name), dtype=np.float32, mode=mode, shape=shape)
+
+    def _write_meta(self):
+        meta = {
+            "state_dim": self.state_dim,
+            "capacity": self.capacity,
+            "size": self.size,
+            "cursor": self.cursor,
+        }
+        tmp_path = os.path.join(self.directory, self.META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.directory, self.META_FILE))
+
+    def __len__(self):
+        return self.size
+
+    def append(self, transition):
+        state_input, action, reward = transition
+        i = self.cursor
+        self.states[i] = state_input
+        self.actions[i] = [action[k] for k in ACTION_KEYS]
+        self.rewards[i] = reward
+        self.cursor = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Return (states, actions, rewards) arrays for `batch_size` transitions.
+        Indices are sorted before gathering so reads walk the files forwards;
+        with chunk_size > 1 each draw is an aligned, contiguous run of rows, which
+        touches fewer pages at the cost of correlated samples (and may return
+        a few rows short when the partial last chunk is drawn).
+        """
+        if self.chunk_size == 1:
+            idx = self.rng.choice(self.size, size=batch_size, replace=False)
+        else:
+            # Chunks are aligned to multiples of chunk_size so they never overlap
+            n_chunks = -(-batch_size // self.chunk_size)
+            n_available = -(-self.size // self.chunk_size)
+            chunks = self.rng.choice(n_available, size=min(n_chunks, n_available), replace=False)
+            idx = (chunks[:, None] * self.chunk_size + np.arange(self.chunk_size)).ravel()
+            idx = idx[idx < self.size][:batch_size]
+        idx.sort()
+        return self.states[idx], self.actions[idx], self.rewards[idx]
+
+    def flush(self):
+        self.states.flush()
+        self.actions.flush()
+        self.rewards.flush()
+        self._write_meta()
@@ -8,14 +8,21 @@ import os
 import tensorflow as tf
 
 from game import Game
+from replay_buffer import MemmapReplayBuffer, ACTION_KEYS
 
 def clamp(x: float, lo: float, hi: float) -> float:
     return lo if x < lo else hi if x > hi else x
 
 class RLAgent:
-    def __init__(self, game: Game, buffer_size=10000, batch_size=256):
+    def __init__(self, game: Game, buffer_size=10000, batch_size=256, replay_dir=None):
         self.game = game
-        self.replay_buffer = deque(maxlen=buffer_size)
+        if replay_dir is not None:
+            # Disk-backed buffer: survives restarts and can hold far more than RAM
+            self.replay_buffer = MemmapReplayBuffer(
+                replay_dir, state_dim=game.cfg.rays.n_rays + 1, capacity=buffer_size
+            )
+        else:
+            self.replay_buffer = deque(maxlen=buffer_size)
         self.batch_size = batch_size
         self.last_obs = None
         self.last_action = None
@@ -137,6 +144,7 @@ class RLAgent:
             if events.get("quit"):
                 self.save_model()
                 self.save_runs()
+                self.save_replay_buffer()
             self.game.reset()
             self.last_obs = None
             self.last_action = None
@@ -145,6 +153,11 @@ class RLAgent:
         self.model.save(self.model_path)
         print(f"Model saved to {self.model_path}")
 
+    def save_replay_buffer(self):
+        if isinstance(self.replay_buffer, MemmapReplayBuffer):
+            self.replay_buffer.flush()
+            print(f"Replay buffer saved to {self.replay_buffer.directory}")
+
     def save_runs(self):
         if not os.path.exists("rl_agent_runs.csv"):
             with open("rl_agent_runs.csv", "w") as f:
@@ -156,21 +169,18 @@ class RLAgent:
 
     def train_model(self):
         print("Training model", end="\r", flush=True)
-        batch = random.sample(self.replay_buffer, self.batch_size)
-        states = []
-        targets = []
-
-        for state_input, action, reward in batch:
-            # Target is the action taken, adjusted by reward
-            target = np.array([
-                clamp(action["throttle"] + reward * 0.01, 0, 1),
-                clamp(action["brake"] + reward * 0.01, 0, 1),
-                clamp(action["steer"] + reward * 0.01, -1, 1),
-            ])
-            states.append(state_input)
-            targets.append(target)
-
-        states = np.array(states)
-        targets = np.array(targets)
+        if isinstance(self.replay_buffer, MemmapReplayBuffer):
+            states, actions, rewards = self.replay_buffer.sample(self.batch_size)
+        else:
+            batch = random.sample(self.replay_buffer, self.batch_size)
+            states = np.array([state_input for state_input, _, _ in batch])
+            actions = np.array([[action[k] for k in ACTION_KEYS] for _, action, _ in batch])
+            rewards = np.array([reward for _, _, reward in batch])
+
+        # Target is the action taken, adjusted by reward
+        targets = actions + rewards[:, None] * 0.01
+        targets[:, :2] = np.clip(targets[:, :2], 0, 1)   # throttle, brake
+        targets[:, 2] = np.clip(targets[:, 2], -1, 1)    # steer
+
         self.model.fit(states, targets, epochs=1, verbose=0)
         print(" "* 20, end="\r", flush=True)